@@ -10,9 +10,10 @@ WHAT THIS SCRIPT DOES
 
 2) Cleans the vertex list by:
    - Removing later-occurring duplicate points (keeping the first occurrence)
-   - Snapping nearly-equal X/Y coordinates to canonical values (equivalence mapping)
+   - Snapping nearly-equal X/Y coordinates to canonical values (union-find equivalence classes)
    - Dropping consecutive duplicates created by snapping
-   - Removing collinear triples (pure horizontal or vertical runs)
+   - Removing collinear triples (pure horizontal or vertical runs), including
+     ones exposed by earlier removals
 
 3) Reorders the polygon for AGP:
    - Keeps the first point in place, reverses the rest (orientation flip)
@@ -25,234 +26,535 @@ WHAT THIS SCRIPT DOES
 INPUT / OUTPUT
 --------------------------------------------------------------------------
 Input  : All *.json files in `input_folder`, each with a "verts" list.
-Output : A corresponding <name>.pol for each input JSON in `output_folder`.
+Output : A corresponding <name>.pol for each input JSON in `output_folder`,
+         or, with --archive OUT.tar, all of them as members of one tar file.
 
 --------------------------------------------------------------------------
 USAGE
 --------------------------------------------------------------------------
 - Set `input_folder` and `output_folder` below.
 - Run the script (Python 3.x). It will write .pol files next to your data.
-- No third-party dependencies are required.
+- On slow/network storage, pass `--archive out.tar` to write a single file.
+- Pass `--timeout SECONDS` to skip files that take longer than that (POSIX only;
+  it cannot interrupt a file stuck inside a compiled loop or one long NumPy call).
+- Polygons under FILTER_NUMPY_MIN vertices are filtered with plain lists,
+  larger ones with NumPy arrays (same result either way).
+- Requires NumPy; uses Numba to compile the snapping loop and orjson to parse
+  the JSON files when they are installed.
 
 """
 
+import io
 import os
 import json
-import math
-import multiprocessing
+import time
+import signal
+import tarfile
+import argparse
+from functools import lru_cache
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: fall back to the stdlib parser
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional: run the same loops uncompiled
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda func: func)
 
 # ---------------------------------------------------------------------
 # Configuration: set your paths
 # ---------------------------------------------------------------------
-# Folder paths (EDIT THESE)
+# Folder paths (EDIT THESE); output_folder is created on demand
 input_folder = "path/to/original/HouseExpo/json/folder"
 output_folder = "path/to/.pol/desired/location"
 
-# Ensure output folder exists
-os.makedirs(output_folder, exist_ok=True)
-
 # ---------------------------------------------------------------------
-# Numeric tolerance for "almost equal" comparisons (floating point)
+# Numeric tolerance: coordinates are quantized to integer multiples of TOL
 # ---------------------------------------------------------------------
 TOL = 1e-6
+SCALE = round(1 / TOL)
+
+# Below this many vertices, the filter runs on plain Python lists (same quantized
+# ints, union-find and sweep): ~20 NumPy calls cost more than the loops themselves
+FILTER_NUMPY_MIN = 100
 
-def almost_equal(a, b, tol=TOL):
-    """Return True if |a - b| < tol."""
-    return abs(a - b) < tol
+# From this many vertices on, remove_later_duplicates uses np.unique; below it a
+# Python set is faster and keeps small polygons as lists for the filter's list path
+DEDUP_NUMPY_MIN = FILTER_NUMPY_MIN
+
+# Guard against pathological inputs (HouseExpo layouts have at most a few thousand)
+MAX_VERTS = 10**6
 
 # ---------------------------------------------------------------------
-# Mapping helpers for snapping nearly-equal coordinates to canonical values
+# Union-find helpers for snapping nearly-equal coordinates to canonical values
+# (compiled with Numba when available; plain Python loops otherwise)
 # ---------------------------------------------------------------------
-def chain_mapping(mapping, key, value):
+@njit(cache=True)
+def find_root(parent, i):
+    """Return the root index of `i`, compressing the path on the way."""
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+@njit(cache=True)
+def union_snaps(keys, values):
     """
-    Merge coordinate equivalence classes for snapping nearly-equal values.
-    Maintains a mapping original -> canonical, folding chains to a single representative.
+    Merge coordinate equivalence classes for each snap (keys[j] -> values[j], in order).
+    A key that is still its own root joins its value's class; two established
+    classes are merged under the larger root.
+    Returns the sorted coordinates involved and the representative of each.
     """
-    final_value = value
-    while final_value in mapping:
-        final_value = mapping[final_value]
-    if mapping.get(key) == final_value:
-        return final_value
-    elif key in mapping:
-        existing_final = mapping[key]
-        chosen = max(existing_final, final_value)
-        old_val = existing_final
-        mapping[key] = chosen
-        if not any(almost_equal(k, old_val) for k in mapping) and not almost_equal(old_val, chosen):
-            mapping[old_val] = chosen
-        for k in list(mapping.keys()):
-            if almost_equal(mapping[k], old_val) or almost_equal(mapping[k], final_value):
-                mapping[k] = chosen
-        return chosen
-    else:
-        mapping[key] = final_value
-        return final_value
+    coords = np.unique(np.concatenate((keys, values)))
+    parent = np.arange(len(coords))
+    for j in range(len(keys)):
+        key = np.searchsorted(coords, keys[j])
+        key_root = find_root(parent, key)
+        value_root = find_root(parent, np.searchsorted(coords, values[j]))
+        if key_root == value_root:
+            continue
+        if key_root == key:
+            parent[key] = value_root
+        else:
+            # coords are sorted, so the larger index is the larger coordinate
+            parent[min(key_root, value_root)] = max(key_root, value_root)
+    for i in range(len(coords)):
+        parent[i] = find_root(parent, i)
+    return coords, coords[parent]
+
+def apply_roots(values, coords, roots):
+    """Replace each value that appears in sorted `coords` by its representative (one vectorized gather)."""
+    if len(coords) == 0:
+        return values
+    pos = np.minimum(np.searchsorted(coords, values), len(coords) - 1)
+    return np.where(coords[pos] == values, roots[pos], values)
+
+def collinear_candidates(xs, ys):
+    """
+    Indices of ring vertices removable right away (collinear with both neighbours on
+    X or Y, or equal to the predecessor). One fused pass of boolean ufuncs writing
+    into preallocated buffers instead of materializing rolled copies of xs/ys.
+    """
+    n = len(xs)
+    eq_x = np.empty(n, dtype=bool)  # eq_x[i]: xs[i] == xs[i - 1] (cyclic)
+    eq_y = np.empty(n, dtype=bool)
+    np.equal(xs[1:], xs[:-1], out=eq_x[1:])
+    np.equal(ys[1:], ys[:-1], out=eq_y[1:])
+    eq_x[:1] = xs[:1] == xs[-1:]
+    eq_y[:1] = ys[:1] == ys[-1:]
+    # cand[i] = eq_x[i] & (eq_x[i + 1] | eq_y[i])  |  eq_y[i] & eq_y[i + 1]
+    cand = np.empty(n, dtype=bool)
+    buf = np.empty(n, dtype=bool)
+    np.logical_or(eq_x[1:], eq_y[:-1], out=cand[:-1])
+    cand[-1:] = eq_x[:1] | eq_y[-1:]
+    np.logical_and(cand, eq_x, out=cand)
+    np.logical_and(eq_y[:-1], eq_y[1:], out=buf[:-1])
+    buf[-1:] = eq_y[-1:] & eq_y[:1]
+    np.logical_or(cand, buf, out=cand)
+    return np.flatnonzero(cand)
+
+@njit(cache=True)
+def remove_collinear(xs, ys, seeds):
+    """
+    Linked-list sweep over the closed ring xs/ys (earcut-style): unlink the middle
+    vertex of every horizontal/vertical triple, and any vertex equal to its predecessor.
+    Starts from `seeds` (see collinear_candidates); the neighbours of each removed
+    vertex are re-checked, so runs and spikes exposed by a removal collapse in the
+    same sweep. Returns a keep mask.
+    """
+    n = len(xs)
+    prev = np.arange(n) - 1
+    nxt = np.arange(n) + 1
+    keep = np.ones(n, dtype=np.bool_)
+    if n == 0:
+        return keep
+    prev[0] = n - 1
+    nxt[n - 1] = 0
+    # Work stack: the seeds, plus both neighbours of each removal (<= 2n entries live)
+    stack = np.empty(2 * n, dtype=np.int64)
+    top = len(seeds)
+    stack[:top] = seeds[::-1]
+    while top > 0:
+        top -= 1
+        i = stack[top]
+        if not keep[i]:
+            continue
+        p, q = prev[i], nxt[i]
+        if xs[p] == xs[i] and ys[p] == ys[i]:
+            # Repeated vertex: drop the later copy so the ring keeps its first point
+            if p > i:
+                i, p, q = p, prev[p], i
+        elif not (xs[p] == xs[i] == xs[q] or ys[p] == ys[i] == ys[q]):
+            continue
+        keep[i] = False
+        nxt[p], prev[q] = q, p
+        stack[top], stack[top + 1] = p, q
+        top += 2
+    return keep
 
-def resolve_mapping(val, mapping):
-    """Follow mapping chains to resolve a coordinate to its canonical representative."""
-    while val in mapping:
-        val = mapping[val]
-    return val
+# ---------------------------------------------------------------------
+# Small polygons: the same union-find and sweep on plain lists and dicts
+# ---------------------------------------------------------------------
+def find_root_small(parent, c):
+    """Return the root coordinate of `c` in the dict forest `parent`, compressing the path."""
+    root = c
+    while parent.get(root, root) != root:
+        root = parent[root]
+    while c != root:
+        parent[c], c = root, parent[c]
+    return root
+
+def union_snap_small(parent, key, value):
+    """One `union_snaps` step (key -> value) on a dict keyed by coordinate."""
+    key_root = find_root_small(parent, key)
+    value_root = find_root_small(parent, value)
+    if key_root == value_root:
+        return
+    if key_root == key:
+        parent[key] = value_root
+    else:
+        parent[min(key_root, value_root)] = max(key_root, value_root)
+
+def remove_collinear_small(pts):
+    """`collinear_candidates` + `remove_collinear` on a list of [x, y] ints; returns the kept points."""
+    n = len(pts)
+    eq_x = [p[0] == q[0] for p, q in zip(pts, pts[-1:] + pts[:-1])]
+    eq_y = [p[1] == q[1] for p, q in zip(pts, pts[-1:] + pts[:-1])]
+    stack = [
+        i for i in range(n - 1, -1, -1)
+        if eq_x[i] and (eq_x[i + 1 - n] or eq_y[i]) or eq_y[i] and eq_y[i + 1 - n]
+    ]
+    if not stack:
+        return pts
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    prev[0] = n - 1
+    nxt[n - 1] = 0
+    keep = [True] * n
+    while stack:
+        i = stack.pop()
+        if not keep[i]:
+            continue
+        p, q = prev[i], nxt[i]
+        if pts[p] == pts[i]:
+            if p > i:
+                i, p, q = p, prev[p], i
+        elif not (pts[p][0] == pts[i][0] == pts[q][0] or pts[p][1] == pts[i][1] == pts[q][1]):
+            continue
+        keep[i] = False
+        nxt[p], prev[q] = q, p
+        stack.append(p)
+        stack.append(q)
+    return [pt for pt, k in zip(pts, keep) if k]
+
+def filter_vertices_small(verts):
+    """Plain-list version of `filter_vertices_on_grid` (identical output) for small polygons."""
+    if isinstance(verts, np.ndarray):
+        verts = verts.tolist()
+    xs = [round(x * SCALE) for x, _ in verts]
+    ys = [round(y * SCALE) for _, y in verts]
+
+    # Keep axis-aligned steps; snap the vertex after each dropped run to the last kept one
+    x_parent, y_parent = {}, {}
+    kept = [0]
+    for i in range(1, len(xs)):
+        x_step = xs[i] == xs[i - 1]
+        if not (x_step or ys[i] == ys[i - 1]):
+            continue
+        last = kept[-1]
+        if last != i - 1:
+            if x_step:
+                union_snap_small(x_parent, xs[i], xs[last])
+            else:
+                union_snap_small(y_parent, ys[i], ys[last])
+        kept.append(i)
+
+    # Replace coordinates by their class representatives, then drop consecutive duplicates
+    pts = []
+    for i in kept:
+        x, y = xs[i], ys[i]
+        if x in x_parent:
+            x = find_root_small(x_parent, x)
+        if y in y_parent:
+            y = find_root_small(y_parent, y)
+        if not pts or pts[-1][0] != x or pts[-1][1] != y:
+            pts.append([x, y])
+
+    return remove_collinear_small(pts)
 
 # ---------------------------------------------------------------------
 # Vertex filter: dedupe, snap nearly-equal coords, remove collinear triples
 # ---------------------------------------------------------------------
-def filter_vertices(verts):
+def filter_vertices_on_grid(verts):
     """
     Given an open polygon (no repeated last vertex), perform:
-    - Single pass to keep axis-aligned progress; defer diagonal points
-    - Build X/Y canonicalization maps when a 'pending' point aligns
-    - Apply mappings to all kept points
+    - Keep axis-aligned progress; drop diagonal points
+    - Union X/Y coordinates into canonical classes where a dropped point is followed by an aligned one
+    - Replace every kept coordinate by its class representative
     - Remove consecutive duplicates
-    - Remove collinear triples (horizontal/vertical runs)
-    Returns an open polygon (no closing duplicate at the end).
+    - Remove collinear triples (horizontal/vertical runs) until none are left
+    Returns an open polygon (no closing duplicate at the end) as a list of [x, y] ints
+    on the TOL grid (value = coordinate / TOL). Polygons below FILTER_NUMPY_MIN
+    vertices take the plain-list path (filter_vertices_small).
     """
-    x_mapping = {}
-    y_mapping = {}
-    new_verts = []
-    new_verts.append(verts[0])
-    prev_kept = verts[0]
-    pending_removed = None
-
-    for i in range(1, len(verts)):
-        current = verts[i]
-        if pending_removed is not None:
-            if almost_equal(current[0], pending_removed[0]) or almost_equal(current[1], pending_removed[1]):
-                if almost_equal(current[0], pending_removed[0]):
-                    key, value = current[0], prev_kept[0]
-                    if key != value and x_mapping.get(key) != value:
-                        x_mapping[key] = chain_mapping(x_mapping, key, value)
-                        x_mapping = {key: value for key, value in x_mapping.items() if key != value}
-                else:
-                    key, value = current[1], prev_kept[1]
-                    if key != value and y_mapping.get(key) != value:
-                        y_mapping[key] = chain_mapping(y_mapping, key, value)
-                        y_mapping = {key: value for key, value in y_mapping.items() if key != value}
-                new_verts.append(current)
-                prev_kept = current
-                pending_removed = None
-            else:
-                pending_removed = current
-                continue
-        else:
-            dx, dy = current[0] - prev_kept[0], current[1] - prev_kept[1]
-            if almost_equal(dx, 0) or almost_equal(dy, 0):
-                new_verts.append(current)
-                prev_kept = current
-            else:
-                pending_removed = current
-
-    corrected_verts = [[resolve_mapping(pt[0], x_mapping), resolve_mapping(pt[1], y_mapping)] for pt in new_verts]
+    if len(verts) < FILTER_NUMPY_MIN:
+        return filter_vertices_small(verts)
+
+    # Quantize once to integer multiples of TOL (separate contiguous X/Y arrays);
+    # every comparison below is exact
+    coords = np.asarray(verts, dtype=np.float64)
+    xs = np.rint(coords[:, 0] * SCALE).astype(np.int64)
+    ys = np.rint(coords[:, 1] * SCALE).astype(np.int64)
+    n = len(xs)
+
+    # A vertex is kept iff it steps axis-aligned from its predecessor (the first is always kept)
+    dx = np.diff(xs) == 0
+    dy = np.diff(ys) == 0
+    keep = np.empty(n, dtype=bool)
+    keep[0] = True
+    keep[1:] = dx | dy
+
+    # Snap events: a kept vertex right after a dropped one is snapped to the last kept vertex
+    last_kept = np.maximum.accumulate(np.where(keep, np.arange(n), 0))
+    snaps = np.flatnonzero(keep[1:] & ~keep[:-1]) + 1
+
+    snap_x = snaps[dx[snaps - 1]]
+    snap_y = snaps[~dx[snaps - 1]]
+    x_coords, x_roots = union_snaps(xs[snap_x], xs[last_kept[snap_x - 1]])
+    y_coords, y_roots = union_snaps(ys[snap_y], ys[last_kept[snap_y - 1]])
+
+    xs = apply_roots(xs[keep], x_coords, x_roots)
+    ys = apply_roots(ys[keep], y_coords, y_roots)
 
     # Remove consecutive duplicate points
-    deduped_verts = []
-    for pt in corrected_verts:
-        if not deduped_verts or not almost_equal(deduped_verts[-1][0], pt[0]) or not almost_equal(deduped_verts[-1][1], pt[1]):
-            deduped_verts.append(pt)
-
-    # Remove collinear triples (horizontal or vertical)
-    final_verts = []
-    n = len(deduped_verts)
-    for i in range(n):
-        prev, curr, nxt = deduped_verts[i - 1], deduped_verts[i], deduped_verts[(i + 1) % n]
-        if almost_equal(prev[1], curr[1]) and almost_equal(curr[1], nxt[1]):
-            continue
-        if almost_equal(prev[0], curr[0]) and almost_equal(curr[0], nxt[0]):
-            continue
-        final_verts.append(curr)
-    return final_verts
+    moved = np.concatenate(([True], (np.diff(xs) != 0) | (np.diff(ys) != 0)))
+    xs, ys = xs[moved], ys[moved]
+
+    # Remove collinear triples (horizontal or vertical), re-checking after each removal
+    kept = remove_collinear(xs, ys, collinear_candidates(xs, ys))
+    return np.column_stack((xs[kept], ys[kept])).tolist()
 
 # ---------------------------------------------------------------------
 # Utility: remove later duplicates, keep first occurrence
 # ---------------------------------------------------------------------
 def remove_later_duplicates(verts):
-    """Keep the first instance of each vertex; drop later duplicates (order preserved)."""
-    seen = set()
-    filtered_verts = []
-    for v in verts:
-        v_tuple = tuple(v)
-        if v_tuple not in seen:
-            filtered_verts.append(v)
-            seen.add(v_tuple)
-    return filtered_verts
+    """
+    Keep the first instance of each vertex; drop later duplicates (order preserved).
+    Small inputs return a list (they take the list path of filter_vertices_on_grid);
+    large inputs return an (N, 2) float array, deduplicated with a stable np.unique
+    over the rows viewed as complex numbers (return_index = first occurrence).
+    """
+    if len(verts) < DEDUP_NUMPY_MIN:
+        seen = set()
+        filtered_verts = []
+        for v in verts:
+            v_tuple = tuple(v)
+            if v_tuple not in seen:
+                filtered_verts.append(v)
+                seen.add(v_tuple)
+        return filtered_verts
+
+    pts = np.ascontiguousarray(verts, dtype=np.float64)
+    _, first = np.unique(pts.view(np.complex128).ravel(), return_index=True)
+    first.sort()
+    return pts[first]
 
 # ---------------------------------------------------------------------
 # Convert float -> reduced fraction "num/den" with fixed denominator scale
 # ---------------------------------------------------------------------
+FRACTION_DEN = 10**6  # scale to preserve precision (= 2**6 * 5**6)
+
+def _reduce_fixed(numerator):
+    """Reduce numerator/10**6; only factors of 2 and 5 can be shared with the denominator."""
+    twos = min(6, (numerator & -numerator).bit_length() - 1) if numerator else 6
+    numerator >>= twos
+    fives = 0
+    while fives < 6 and numerator % 5 == 0:
+        numerator //= 5
+        fives += 1
+    return numerator, (1 << (6 - twos)) * 5 ** (6 - fives)
+
+@lru_cache(maxsize=1 << 20)
+def _fraction_from_int(numerator):
+    """
+    Format numerator/10**6 as a reduced "num/den" string.
+    Memoized per worker process for the whole batch: snapped coordinates repeat
+    across vertices and across files on the same building grid.
+    """
+    num, den = _reduce_fixed(numerator)
+    return f"{num}/{den}"
+
 def convert_to_fraction(value):
     """Convert a float to an int/int fraction format (reduced)."""
-    denominator = 10**6  # scale to preserve precision
-    numerator = round(value * denominator)
-    gcd = math.gcd(numerator, denominator)
-    return f"{numerator // gcd}/{denominator // gcd}"
+    return _fraction_from_int(round(value * FRACTION_DEN))
+
+def grid_to_fraction(q):
+    """Convert a coordinate quantized to the TOL grid (q * TOL) to a reduced fraction."""
+    if SCALE == FRACTION_DEN:
+        return _fraction_from_int(q)
+    return convert_to_fraction(q / SCALE)
 
 # ---------------------------------------------------------------------
-# Core: read JSON -> clean verts -> reverse orientation -> write .pol
+# Core: read JSON -> clean verts -> reverse orientation -> .pol line
 # ---------------------------------------------------------------------
-def process_file(file_path, output_folder):
-    """Process a single JSON file and convert it to .pol format."""
+def convert_file(file_path):
+    """Convert a single JSON file; returns (pol_filename, pol_bytes), or None if skipped."""
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read()) if orjson else json.load(f)
 
         original_verts = data["verts"]
+        if len(original_verts) >= MAX_VERTS:
+            raise ValueError(f"{len(original_verts)} vertices, limit is {MAX_VERTS}")
 
         # Deduplicate later occurrences
         vertices = remove_later_duplicates(original_verts)
 
-        # Filter/snap/simplify
-        filtered_verts = filter_vertices(vertices)
+        # Filter/snap/simplify (coordinates stay on the integer TOL grid)
+        filtered_verts = filter_vertices_on_grid(vertices)
 
         if not filtered_verts:
             print(f"Skipping {file_path} (No valid vertices after filtering).")
-            return
+            return None
         
         # Reverse order but keep the first vertex in place (AGP orientation expectation)
         first_point = filtered_verts[0]
         reversed_verts = [first_point] + filtered_verts[:0:-1]
 
         # Build .pol line: count + all coords as simplified fractions
-        num_vertices = len(reversed_verts)
-        pol_representation = f"{num_vertices} " + " ".join(
-            f"{convert_to_fraction(pt[0])} {convert_to_fraction(pt[1])}" for pt in reversed_verts
-        )
+        parts = [str(len(reversed_verts))]
+        append = parts.append
+        for x, y in reversed_verts:
+            append(grid_to_fraction(x))
+            append(grid_to_fraction(y))
 
-        # Save as .pol
         pol_filename = os.path.splitext(os.path.basename(file_path))[0] + ".pol"
-        pol_filepath = os.path.join(output_folder, pol_filename)
-        with open(pol_filepath, 'w') as pol_file:
-            pol_file.write(pol_representation + "\n")
-
-        print(f"Saved: {pol_filepath}")
+        return pol_filename, (" ".join(parts) + "\n").encode()
 
     except Exception as e:
         print(f"Skipping {file_path} (Error: {e}).")
+        return None
 
 # ---------------------------------------------------------------------
-# Timeout wrapper: skip unusually large/slow files
+# Optional per-file deadline: in-process SIGALRM, no extra process per file
 # ---------------------------------------------------------------------
-def process_file_with_timeout(file_path, output_folder, timeout=30):
-    """Run process_file with a timeout using multiprocessing."""
-    process = multiprocessing.Process(target=process_file, args=(file_path, output_folder))
-    process.start()
-    process.join(timeout)
-    if process.is_alive():
-        print(f"Skipping {file_path} (Processing timeout reached).")
-        process.terminate()
-        process.join()
+def _compile_loops():
+    """
+    Pool initializer: run the NumPy filter path once on a small repeated ring so the
+    Numba loops are compiled (or loaded from cache) before any per-file deadline starts.
+    """
+    ring = [[0, 0], [1, 0], [2, 0], [2, 1], [1, 2], [1, 1], [0, 1]]
+    filter_vertices_on_grid(ring * -(-FILTER_NUMPY_MIN // len(ring)))
+
+def _deadline_reached(signum, frame):
+    raise TimeoutError("processing timeout reached")
+
+def convert_file_with_timeout(file_path, timeout=None):
+    """
+    Run convert_file, skipping the file if it takes longer than `timeout` seconds.
+    Uses a real-time interval timer in the current (worker) process; where SIGALRM
+    does not exist (Windows) the file is converted without a deadline.
+    The alarm is only handled between Python bytecodes, so it cannot interrupt a
+    file stuck inside a compiled loop or a single long NumPy call.
+    """
+    if not timeout or not hasattr(signal, "SIGALRM"):
+        return convert_file(file_path)
+    signal.signal(signal.SIGALRM, _deadline_reached)
+    try:
+        try:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+            # convert_file reports the TimeoutError like any other error and skips
+            return convert_file(file_path)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except (TimeoutError, signal.ItimerError) as e:
+        # The (one-shot) timer fired outside convert_file, e.g. just before it was
+        # disarmed, or the timeout was rejected; never let it abort the whole batch
+        print(f"Skipping {file_path} (Error: {e}).")
+        return None
+
+def process_file(file_path, output_folder, timeout=None):
+    """Process a single JSON file and save it as <name>.pol in `output_folder`."""
+    result = convert_file_with_timeout(file_path, timeout)
+    if result is None:
+        return
+    pol_filename, pol_bytes = result
+    pol_filepath = os.path.join(output_folder, pol_filename)
+    try:
+        with open(pol_filepath, 'wb') as pol_file:
+            pol_file.write(pol_bytes)
+        print(f"Saved: {pol_filepath}")
+    except OSError as e:
+        print(f"Skipping {file_path} (Error: {e}).")
 
 # ---------------------------------------------------------------------
 # Batch runner: process all JSON files in a folder
 # ---------------------------------------------------------------------
-def process_folder(input_folder, output_folder):
-    """Process all JSON files in the folder with a timeout per file."""
-    files = [f for f in os.listdir(input_folder) if f.endswith('.json')]
-    for file in files:
-        file_path = os.path.join(input_folder, file)
-        process_file_with_timeout(file_path, output_folder, timeout=10)
+def process_folder(input_folder, output_folder, archive=None, timeout=None):
+    """
+    Process all JSON files in the folder in parallel on a pool of reused workers.
+    With `archive`, workers send each .pol back and the parent streams them all into
+    that one tar file (no per-file create/close on the output file system).
+    With `timeout`, files taking longer than that many seconds are skipped; each
+    worker compiles the Numba loops first so compile time is not charged to a file.
+    """
+    if timeout is not None and timeout < 0:
+        raise ValueError(f"timeout must be positive, got {timeout}")
+    file_paths = [
+        entry.path for entry in os.scandir(input_folder)
+        if entry.name.endswith('.json') and entry.is_file()
+    ]
+    workers = os.cpu_count() or 1
+    # Hand out files in chunks (as Pool.map does) so each round-trip to a worker
+    # carries several files instead of one pickled task + future per file
+    chunksize = max(1, -(-len(file_paths) // (workers * 4)))
+    initializer = _compile_loops if timeout else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as executor:
+        if archive is None:
+            os.makedirs(output_folder, exist_ok=True)
+            for _ in executor.map(process_file, file_paths, repeat(output_folder), repeat(timeout),
+                                  chunksize=chunksize):
+                pass
+            return
+
+        with tarfile.open(archive, 'w') as tar:
+            for result in executor.map(convert_file_with_timeout, file_paths, repeat(timeout),
+                                       chunksize=chunksize):
+                if result is None:
+                    continue
+                pol_filename, pol_bytes = result
+                info = tarfile.TarInfo(pol_filename)
+                info.size = len(pol_bytes)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(pol_bytes))
+        print(f"Saved: {archive}")
 
 # ---------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------
+def positive_seconds(value):
+    """argparse type for --timeout: a number of seconds greater than zero."""
+    seconds = float(value)
+    if not seconds > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return seconds
+
 if __name__ == "__main__":
-    process_folder(input_folder, output_folder)
+    parser = argparse.ArgumentParser(description="Convert HouseExpo JSON polygons to AGP .pol files.")
+    parser.add_argument("--archive", metavar="OUT.tar",
+                        help="write all .pol files into this tar archive instead of output_folder")
+    parser.add_argument("--timeout", type=positive_seconds, metavar="SECONDS",
+                        help="skip files that take longer than this (POSIX only; off by default). "
+                             "Checked between Python steps, so it cannot stop a file stuck "
+                             "inside a compiled loop or a single long NumPy call")
+    args = parser.parse_args()
+    process_folder(input_folder, output_folder, archive=args.archive, timeout=args.timeout)
@@ -26,29 +26,49 @@ Purpose
 -------
 Clean up polygon vertex lists from HouseExpo-style JSON files. The script:
 1) Removes later-occurring duplicate vertices (keeps the first occurrence),
-2) Snaps nearly-equal X/Y coordinates to a canonical value via mapping,
+2) Snaps nearly-equal X/Y coordinates to a canonical value via union-find,
 3) Drops consecutive duplicates introduced by snapping,
-4) Removes collinear triples (purely horizontal or vertical runs),
-5) Plots Original vs Filtered polygons for quick visual QA.
+4) Removes collinear triples (purely horizontal or vertical runs), repeating
+   until none are left,
+5) Optionally (--plot) plots Original vs Filtered polygons for quick visual QA.
 
 I/O
 ---
 Input  : A folder containing *.json files with a structure like:
          { "verts": [[x1, y1], [x2, y2], ...] }
-Output : No files are modified by default. The script prints and plots results.
-         (Code to write cleaned vertices back to JSON is included but commented out.)
+Output : A copy of each JSON in `output_path` with "verts" replaced by the
+         filtered (closed) polygon. Run with --plot to also show the overlays.
 
 Notes
 -----
-- Uses a small tolerance `TOL` for floating-point comparisons.
+- Quantizes coordinates to a `TOL` grid so all comparisons are exact integer ones.
+- Polygons under `FILTER_NUMPY_MIN` vertices are filtered with plain lists,
+  larger ones with NumPy arrays (same result either way).
 - Appends the first vertex to the end of the filtered list.
+- Compiles the snapping union-find with Numba and reads/writes JSON with orjson
+  when they are installed. The refined files then differ in format only: orjson
+  writes 2-space indents, raw UTF-8 and its own float notation (1e-7), the json
+  fallback 4-space indents, escaped non-ASCII and Python floats (1e-07).
 
 """
 
 import os
 import json
+import argparse
+import numpy as np
 import matplotlib.pyplot as plt
 
+try:
+    import orjson
+except ImportError:  # orjson is optional: fall back to the stdlib parser/writer
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional: run the same loops uncompiled
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda func: func)
+
 
 # Specify your input folder where the original JSON files are located
 folder_path = "path/to/original/jsons/folder"  # Change this to your actual folder
@@ -59,99 +79,355 @@ os.makedirs(output_path, exist_ok=True)
 
 
 TOL = 1e-6
+# Coordinates are quantized once to integer multiples of TOL (x -> round(x * SCALE)),
+# so snapping, dedup and collinearity tests are exact integer comparisons.
+SCALE = round(1 / TOL)
+
+# Below this many vertices, `filter_vertices` runs on plain Python lists (same
+# quantized ints, union-find and sweep): the ~20 NumPy calls of the array path
+# cost more than the loops themselves on typical HouseExpo rooms
+FILTER_NUMPY_MIN = 100
+
+# From this many vertices on, `remove_later_duplicates` uses np.unique (below it,
+# a Python set is faster and keeps small polygons as lists for the list path)
+DEDUP_NUMPY_MIN = FILTER_NUMPY_MIN
 
-def almost_equal(a, b, tol=TOL):
+
+@njit(cache=True)
+def find_root(parent, i):
     """
-    Return True if two floats are within `tol` of each other.
+    Resolve a coordinate index to the root of its equivalence class.
+
+    Every node visited on the way is re-pointed directly at the root
+    (path compression), so repeated lookups stay close to O(1).
 
     Parameters
     ----------
-    a, b : float
-        Values to compare.
-    tol : float
-        Absolute tolerance.
+    parent : np.ndarray[int]
+        Union-find forest over indices into a sorted coordinate array.
+    i : int
+        Index to resolve.
 
     Returns
     -------
-    bool
+    int
+        Root index (possibly `i` itself).
     """
 
-    return abs(a - b) < tol
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    # Path compression
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
 
 
-def chain_mapping(mapping, key, value):
+@njit(cache=True)
+def union_snaps(keys, values):
     """
     Merge coordinate equivalence classes for snapping nearly-equal values.
 
-    This maintains a mapping from raw coordinates to their chosen canonical value.
-    If `key` already maps through a chain, we resolve to the final representative
-    and make sure the mapping is transitive and consistent.
+    Snaps are applied in order: `keys[j]` is snapped towards `values[j]`.
 
     Parameters
     ----------
-    mapping : dict[float, float]
-        Current mapping of original -> canonical coordinate values (either x or y).
-    key : float
-        The raw coordinate value that should be mapped.
-    value : float
-        The target canonical coordinate (often a previously kept neighbor).
+    keys : np.ndarray[int]
+        The raw (quantized) coordinate values that should be snapped.
+    values : np.ndarray[int]
+        The target canonical coordinates (often previously kept neighbors).
 
     Returns
     -------
-    float
-        The final canonical value chosen for `key`.
+    coords : np.ndarray[int]
+        Sorted coordinates that took part in any snap.
+    roots : np.ndarray[int]
+        Canonical value chosen for each entry of `coords`.
     """
 
-    final_value = value
-    # Follow existing chains to a final representative
-    while final_value in mapping:
-        final_value = mapping[final_value]
-
-    if mapping.get(key) == final_value:
-        # Already consistent
-        return final_value
-    elif key in mapping:
-        # Key already mapped: choose a single representative (max) and collapse chains
-        existing_final = mapping[key]
-        chosen = max(existing_final, final_value)
-        old_val = existing_final
-        mapping[key] = chosen
-
-        # If old_val is not already a key and differs from chosen, redirect it to chosen
-        if not any(almost_equal(k, old_val) for k in mapping) and not almost_equal(old_val, chosen):
-            mapping[old_val] = chosen
-        
-        # Re-point any values that referenced old_val/final_value to chosen
-        for k in list(mapping.keys()):
-            if almost_equal(mapping[k], old_val) or almost_equal(mapping[k], final_value):
-                mapping[k] = chosen
-        return chosen
+    coords = np.unique(np.concatenate((keys, values)))
+    parent = np.arange(len(coords))
+    for j in range(len(keys)):
+        key = np.searchsorted(coords, keys[j])
+        key_root = find_root(parent, key)
+        value_root = find_root(parent, np.searchsorted(coords, values[j]))
+        if key_root == value_root:
+            # Already consistent
+            continue
+        if key_root == key:
+            # Key not snapped yet: it (and anything snapped onto it) joins value's class
+            parent[key] = value_root
+        else:
+            # Both classes established: keep a single representative (max);
+            # coords are sorted, so the larger index is the larger coordinate
+            parent[min(key_root, value_root)] = max(key_root, value_root)
+    for i in range(len(coords)):
+        parent[i] = find_root(parent, i)
+    return coords, coords[parent]
+
+
+def apply_roots(values, coords, roots):
+    """
+    Replace every value that took part in a snap by its canonical representative.
+
+    Parameters
+    ----------
+    values : np.ndarray[int]
+        Quantized coordinates (either x or y).
+    coords, roots : np.ndarray[int]
+        Output of `union_snaps` (sorted coordinates and their representatives).
+
+    Returns
+    -------
+    np.ndarray[int]
+        `values` with snapped coordinates replaced (one searchsorted + gather).
+    """
+
+    if len(coords) == 0:
+        return values
+    pos = np.minimum(np.searchsorted(coords, values), len(coords) - 1)
+    return np.where(coords[pos] == values, roots[pos], values)
+
+
+def collinear_candidates(xs, ys):
+    """
+    Find ring vertices that `remove_collinear` can unlink right away.
+
+    A vertex qualifies when (prev, curr, next) share X or share Y, or when it
+    equals its predecessor. The test is one fused pass of boolean ufuncs that
+    write into preallocated buffers (no rolled copies of xs/ys).
+
+    Parameters
+    ----------
+    xs, ys : np.ndarray[int]
+        Quantized coordinates of the ring (open; the last vertex connects to the first).
+
+    Returns
+    -------
+    np.ndarray[int]
+        Candidate indices in ascending order.
+    """
+
+    n = len(xs)
+    # eq_x[i]: xs[i] == xs[i - 1] (cyclic), same for eq_y
+    eq_x = np.empty(n, dtype=bool)
+    eq_y = np.empty(n, dtype=bool)
+    np.equal(xs[1:], xs[:-1], out=eq_x[1:])
+    np.equal(ys[1:], ys[:-1], out=eq_y[1:])
+    eq_x[:1] = xs[:1] == xs[-1:]
+    eq_y[:1] = ys[:1] == ys[-1:]
+
+    # cand[i] = eq_x[i] & (eq_x[i + 1] | eq_y[i])  |  eq_y[i] & eq_y[i + 1]
+    cand = np.empty(n, dtype=bool)
+    buf = np.empty(n, dtype=bool)
+    np.logical_or(eq_x[1:], eq_y[:-1], out=cand[:-1])
+    cand[-1:] = eq_x[:1] | eq_y[-1:]
+    np.logical_and(cand, eq_x, out=cand)
+    np.logical_and(eq_y[:-1], eq_y[1:], out=buf[:-1])
+    buf[-1:] = eq_y[-1:] & eq_y[:1]
+    np.logical_or(cand, buf, out=cand)
+    return np.flatnonzero(cand)
+
+
+@njit(cache=True)
+def remove_collinear(xs, ys, seeds):
+    """
+    Remove collinear and repeated vertices from a closed ring with a linked-list sweep.
+
+    Vertices live in a doubly linked list (earcut-style). A vertex is unlinked when
+    (prev, curr, next) share X or share Y, or when it equals its predecessor; both
+    neighbours are then re-queued, so runs and spikes exposed by a removal collapse
+    in the same sweep instead of needing another pass.
+
+    Parameters
+    ----------
+    xs, ys : np.ndarray[int]
+        Quantized coordinates of the ring (open; the last vertex connects to the first).
+    seeds : np.ndarray[int]
+        Vertices to check first (`collinear_candidates`); any other vertex can only
+        become removable once a neighbour is unlinked, and is re-queued then.
+
+    Returns
+    -------
+    np.ndarray[bool]
+        Keep mask (order of the survivors is unchanged).
+    """
+
+    n = len(xs)
+    prev = np.arange(n) - 1
+    nxt = np.arange(n) + 1
+    keep = np.ones(n, dtype=np.bool_)
+    if n == 0:
+        return keep
+    prev[0] = n - 1
+    nxt[n - 1] = 0
+    # Work stack: the seeds, plus both neighbours of each removal (<= 2n entries live)
+    stack = np.empty(2 * n, dtype=np.int64)
+    top = len(seeds)
+    stack[:top] = seeds[::-1]
+    while top > 0:
+        top -= 1
+        i = stack[top]
+        if not keep[i]:
+            continue
+        p, q = prev[i], nxt[i]
+        if xs[p] == xs[i] and ys[p] == ys[i]:
+            # Repeated vertex: drop the later copy so the ring keeps its first point
+            if p > i:
+                i, p, q = p, prev[p], i
+        elif not (xs[p] == xs[i] == xs[q] or ys[p] == ys[i] == ys[q]):
+            continue
+        # Unlink i and re-check both neighbours
+        keep[i] = False
+        nxt[p], prev[q] = q, p
+        stack[top], stack[top + 1] = p, q
+        top += 2
+    return keep
+
+
+def find_root_small(parent, c):
+    """
+    Dict version of `find_root`: resolve coordinate `c` to the root of its class.
+
+    Parameters
+    ----------
+    parent : dict[int, int]
+        Union-find forest keyed by quantized coordinate (absent = own root).
+    c : int
+        Quantized coordinate to resolve.
+
+    Returns
+    -------
+    int
+        Root coordinate (possibly `c` itself).
+    """
+
+    root = c
+    while parent.get(root, root) != root:
+        root = parent[root]
+    # Path compression
+    while c != root:
+        parent[c], c = root, parent[c]
+    return root
+
+
+def union_snap_small(parent, key, value):
+    """
+    One `union_snaps` step (key -> value) on the dict forest of `find_root_small`.
+
+    Coordinates are compared directly, so "larger root" is the same choice
+    `union_snaps` makes through indices into its sorted coordinate array.
+    """
+
+    key_root = find_root_small(parent, key)
+    value_root = find_root_small(parent, value)
+    if key_root == value_root:
+        return
+    if key_root == key:
+        parent[key] = value_root
     else:
-        # First time we see this key: record and return
-        mapping[key] = final_value
-        return final_value
+        parent[min(key_root, value_root)] = max(key_root, value_root)
 
 
-def resolve_mapping(val, mapping):
+def remove_collinear_small(pts):
     """
-    Resolve a coordinate through the mapping chain to its canonical value.
+    `collinear_candidates` + `remove_collinear` on a list of [x, y] ints.
 
     Parameters
     ----------
-    val : float
-        Coordinate to resolve.
-    mapping : dict[float, float]
-        Canonicalization mapping.
+    pts : list[list[int, int]]
+        Closed ring of quantized vertices (open list, last links to first).
 
     Returns
     -------
-    float
-        Canonical (possibly unchanged) value.
+    list[list[int, int]]
+        The kept vertices (`pts` itself when nothing is removable).
     """
 
-    while val in mapping:
-        val = mapping[val]
-    return val
+    n = len(pts)
+    eq_x = [p[0] == q[0] for p, q in zip(pts, pts[-1:] + pts[:-1])]
+    eq_y = [p[1] == q[1] for p, q in zip(pts, pts[-1:] + pts[:-1])]
+    stack = [
+        i for i in range(n - 1, -1, -1)
+        if eq_x[i] and (eq_x[i + 1 - n] or eq_y[i]) or eq_y[i] and eq_y[i + 1 - n]
+    ]
+    if not stack:
+        return pts
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    prev[0] = n - 1
+    nxt[n - 1] = 0
+    keep = [True] * n
+    while stack:
+        i = stack.pop()
+        if not keep[i]:
+            continue
+        p, q = prev[i], nxt[i]
+        if pts[p] == pts[i]:
+            # Repeated vertex: drop the later copy so the ring keeps its first point
+            if p > i:
+                i, p, q = p, prev[p], i
+        elif not (pts[p][0] == pts[i][0] == pts[q][0] or pts[p][1] == pts[i][1] == pts[q][1]):
+            continue
+        # Unlink i and re-check both neighbours
+        keep[i] = False
+        nxt[p], prev[q] = q, p
+        stack.append(p)
+        stack.append(q)
+    return [pt for pt, k in zip(pts, keep) if k]
+
+
+def filter_vertices_small(verts):
+    """
+    Plain-list version of `filter_vertices` for polygons below `FILTER_NUMPY_MIN`.
+
+    Same quantization, keep rule, union-find snapping and collinear sweep as the
+    array path, so the output is identical.
+
+    Parameters
+    ----------
+    verts : list[list[float, float]] or np.ndarray
+        Input vertices (open polygon).
+
+    Returns
+    -------
+    list[list[float, float]]
+        Filtered vertices (open polygon).
+    """
+
+    if isinstance(verts, np.ndarray):
+        verts = verts.tolist()
+    xs = [round(x * SCALE) for x, _ in verts]
+    ys = [round(y * SCALE) for _, y in verts]
+
+    # Keep axis-aligned steps; the vertex after a dropped run snaps to the last kept one
+    x_parent, y_parent = {}, {}
+    kept = [0]
+    for i in range(1, len(xs)):
+        x_step = xs[i] == xs[i - 1]
+        if not (x_step or ys[i] == ys[i - 1]):
+            continue
+        last = kept[-1]
+        if last != i - 1:
+            if x_step:
+                union_snap_small(x_parent, xs[i], xs[last])
+            else:
+                union_snap_small(y_parent, ys[i], ys[last])
+        kept.append(i)
+
+    # Apply canonical X/Y representatives and drop consecutive duplicates
+    pts = []
+    for i in kept:
+        x, y = xs[i], ys[i]
+        if x in x_parent:
+            x = find_root_small(x_parent, x)
+        if y in y_parent:
+            y = find_root_small(y_parent, y)
+        if not pts or pts[-1][0] != x or pts[-1][1] != y:
+            pts.append([x, y])
+
+    return [[x / SCALE, y / SCALE] for x, y in remove_collinear_small(pts)]
+
 
 def filter_vertices(verts):
     """
@@ -159,20 +435,21 @@ def filter_vertices(verts):
 
     Steps
     -----
-    1) Keep the first vertex; track it as `prev_kept`.
-    2) Iterate the list, attempting to keep axis-aligned progress (dx==0 or dy==0).
-       If a non-axis-aligned step appears, mark it as `pending_removed`.
-    3) If the next point aligns with `pending_removed` in x or y, we
-       'snap' coordinates by building x/y mapping (canonicalization),
-       then keep `current` and clear the pending marker.
-    4) After one pass, apply the accumulated x/y mappings to all kept points.
+    1) Always keep the first vertex.
+    2) Keep every vertex that steps axis-aligned (dx==0 or dy==0) from its
+       predecessor; a non-axis-aligned step marks the vertex as pending/dropped.
+    3) If the next point aligns with the dropped one in x or y, we
+       'snap' coordinates by merging x/y union-find classes (canonicalization)
+       towards the last kept vertex.
+    4) Replace every kept coordinate by the representative of its class.
     5) Remove consecutive duplicates introduced by snapping.
-    6) Remove collinear triples (pure horizontal or pure vertical runs).
+    6) Remove collinear triples (pure horizontal or pure vertical runs) and any
+       duplicates or new triples those removals expose.
     7) Return the final list (open polygon; no repeated last vertex).
 
     Parameters
     ----------
-    verts : list[list[float, float]]
+    verts : list[list[float, float]] or np.ndarray
         Input vertices (open polygon).
 
     Returns
@@ -181,69 +458,48 @@ def filter_vertices(verts):
         Filtered vertices (open polygon).
     """
 
-    x_mapping = {}
-    y_mapping = {}
-    new_verts = []
-    new_verts.append(verts[0])
-    prev_kept = verts[0]
-    pending_removed = None
-
-    # Single pass: keep axis-aligned progress; defer/slurp misaligned candidates
-    for i in range(1, len(verts)):
-        current = verts[i]
-
-        if pending_removed is not None:
-            # If current lines up in x OR y with the pending 'corner', we accept and snap
-            if almost_equal(current[0], pending_removed[0]) or almost_equal(current[1], pending_removed[1]):
-                if almost_equal(current[0], pending_removed[0]):
-                    # Snap X to previous-kept X
-                    key, value = current[0], prev_kept[0]
-                    if key != value and x_mapping.get(key) != value:
-                        x_mapping[key] = chain_mapping(x_mapping, key, value)
-                        # Drop identity mappings (k==v)
-                        x_mapping = {key: value for key, value in x_mapping.items() if key != value}
-                else:
-                    # Snap Y to previous-kept Y
-                    key, value = current[1], prev_kept[1]
-                    if key != value and y_mapping.get(key) != value:
-                        y_mapping[key] = chain_mapping(y_mapping, key, value)
-                        y_mapping = {key: value for key, value in y_mapping.items() if key != value}
-                new_verts.append(current)
-                prev_kept = current
-                pending_removed = None
-            else:
-                # Still misaligned: keep it pending; try the next one
-                pending_removed = current
-                continue
-        else:
-            # Normal case: keep axis-aligned steps; defer diagonal/off-axis corners
-            dx, dy = current[0] - prev_kept[0], current[1] - prev_kept[1]
-            if almost_equal(dx, 0) or almost_equal(dy, 0):
-                new_verts.append(current)
-                prev_kept = current
-            else:
-                pending_removed = current
-
-    # Apply canonical (snapped) X/Y mappings
-    corrected_verts = [[resolve_mapping(pt[0], x_mapping), resolve_mapping(pt[1], y_mapping)] for pt in new_verts]
+    if len(verts) < FILTER_NUMPY_MIN:
+        return filter_vertices_small(verts)
+
+    # Quantize once to integer multiples of TOL; every comparison below is exact.
+    # X and Y live in separate contiguous arrays (not strided columns of an (N,2) array).
+    coords = np.asarray(verts, dtype=np.float64)
+    xs = np.rint(coords[:, 0] * SCALE).astype(np.int64)
+    ys = np.rint(coords[:, 1] * SCALE).astype(np.int64)
+    n = len(xs)
+
+    # Axis-aligned step masks against the predecessor. Whether the predecessor was kept
+    # or left pending, the single pass always compares `current` with verts[i - 1], so
+    # the keep decision is one vectorized test (the first vertex is always kept).
+    dx = np.diff(xs) == 0
+    dy = np.diff(ys) == 0
+    keep = np.empty(n, dtype=bool)
+    keep[0] = True
+    keep[1:] = dx | dy
+
+    # Snap events: a kept vertex whose predecessor was dropped (the pending 'corner').
+    # `last_kept[i]` is the index of the last kept vertex at or before i.
+    last_kept = np.maximum.accumulate(np.where(keep, np.arange(n), 0))
+    snaps = np.flatnonzero(keep[1:] & ~keep[:-1]) + 1
+
+    # Snap X to previous-kept X where the x coordinates lined up, Y otherwise
+    snap_x = snaps[dx[snaps - 1]]
+    snap_y = snaps[~dx[snaps - 1]]
+    x_coords, x_roots = union_snaps(xs[snap_x], xs[last_kept[snap_x - 1]])
+    y_coords, y_roots = union_snaps(ys[snap_y], ys[last_kept[snap_y - 1]])
+
+    # Apply canonical (snapped) X/Y representatives
+    xs = apply_roots(xs[keep], x_coords, x_roots)
+    ys = apply_roots(ys[keep], y_coords, y_roots)
 
     # Remove consecutive duplicates introduced by snapping
-    deduped_verts = []
-    for pt in corrected_verts:
-        if not deduped_verts or not almost_equal(deduped_verts[-1][0], pt[0]) or not almost_equal(deduped_verts[-1][1], pt[1]):
-            deduped_verts.append(pt)
-
-    # Remove collinear triples: skip middle if (prev, curr, next) share X or share Y
-    final_verts = []
-    n = len(deduped_verts)
-    for i in range(n):
-        prev, curr, nxt = deduped_verts[i - 1], deduped_verts[i], deduped_verts[(i + 1) % n]
-        if almost_equal(prev[1], curr[1]) and almost_equal(curr[1], nxt[1]):
-            continue
-        if almost_equal(prev[0], curr[0]) and almost_equal(curr[0], nxt[0]):
-            continue
-        final_verts.append(curr)
-    return final_verts
+    moved = np.concatenate(([True], (np.diff(xs) != 0) | (np.diff(ys) != 0)))
+    xs, ys = xs[moved], ys[moved]
+
+    # Remove collinear triples: unlink middle if (prev, curr, next) share X or share Y,
+    # re-checking the neighbours of every removed vertex
+    kept = remove_collinear(xs, ys, collinear_candidates(xs, ys))
+    return (np.column_stack((xs[kept], ys[kept])) / SCALE).tolist()
 
 
 def plot_polygon(vertices, label, color):
@@ -266,49 +522,68 @@ def remove_later_duplicates(verts):
     """
     Keep the first occurrence of each vertex; drop later duplicates.
 
+    Small inputs use a Python set and stay a list (for the list path of
+    `filter_vertices`); from `DEDUP_NUMPY_MIN` vertices on, each (x, y) row is
+    viewed as one complex number and deduplicated with a stable `np.unique`,
+    whose `return_index` gives the first occurrences.
+
     Parameters
     ----------
     verts : list[list[float, float]]
 
     Returns
     -------
-    list[list[float, float]]
-        Deduplicated vertex list (order preserved).
+    list[list[float, float]] or np.ndarray
+        Deduplicated vertices (order preserved): the list below `DEDUP_NUMPY_MIN`,
+        else an (N, 2) float array ready for `filter_vertices` without another
+        conversion.
     """
 
-    seen = set()
-    filtered_verts = []
-    
-    for v in verts:
-        v_tuple = tuple(v)  # Convert to tuple for hashability
-        if v_tuple not in seen:
-            filtered_verts.append(v)
-            seen.add(v_tuple)
-    
-    return filtered_verts
+    if len(verts) < DEDUP_NUMPY_MIN:
+        seen = set()
+        filtered_verts = []
+        
+        for v in verts:
+            v_tuple = tuple(v)  # Convert to tuple for hashability
+            if v_tuple not in seen:
+                filtered_verts.append(v)
+                seen.add(v_tuple)
+        
+        return filtered_verts
+
+    pts = np.ascontiguousarray(verts, dtype=np.float64)
+    _, first = np.unique(pts.view(np.complex128).ravel(), return_index=True)
+    first.sort()
+    return pts[first]
 
 # Process all JSON files in a folder
-def process_folder(folder_path):
+def process_folder(folder_path, plot=False):
     """
     Process every `*.json` in `folder_path`:
     - Load `verts`
     - Remove later duplicates
     - Filter/snap & simplify via `filter_vertices`
-    - Close the polygon (append first vertex) for plotting
-    - Plot Original vs Filtered overlays
+    - Close the polygon (append first vertex)
+    - Write the refined JSON to `output_path`
+    - Optionally plot Original vs Filtered overlays
 
     Parameters
     ----------
     folder_path : str
         Path to a folder containing HouseExpo-style JSON files.
+    plot : bool
+        Show a blocking comparison plot for every file.
     """
-    files = [f for f in os.listdir(folder_path) if f.endswith('.json')]
+    entries = [
+        entry for entry in os.scandir(folder_path)
+        if entry.name.endswith('.json') and entry.is_file()
+    ]
     
-    for file in files:
-        file_path = os.path.join(folder_path, file)
+    for entry in entries:
+        file, file_path = entry.name, entry.path
         
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read()) if orjson else json.load(f)
         
         original_verts = data["verts"]
         print(f"Original vertices for {file}: {original_verts}")
@@ -328,18 +603,29 @@ def process_folder(folder_path):
         out_data["verts"] = filtered_verts # use EXACTLY the filtered_verts you built
 
         out_path = os.path.join(output_path, file)
-        with open(out_path, "w", encoding="utf-8") as f_out:
-            json.dump(out_data, f_out, indent=4)
+        if orjson:
+            with open(out_path, "wb") as f_out:
+                f_out.write(orjson.dumps(out_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(out_path, "w", encoding="utf-8") as f_out:
+                json.dump(out_data, f_out, indent=4)
 
         print(f"Wrote filtered JSON → {out_path}")
         
-        # Visual comparison
-        plt.figure(figsize=(8, 6))
-        plot_polygon(original_verts, "Original", "red")
-        plot_polygon(filtered_verts, "Filtered", "blue")
-        plt.legend()
-        plt.title(f"Polygon Comparison: {file}")
-        plt.show()
-
-process_folder(folder_path)
+        if plot:
+            # Visual comparison
+            fig = plt.figure(figsize=(8, 6))
+            plot_polygon(original_verts, "Original", "red")
+            plot_polygon(filtered_verts, "Filtered", "blue")
+            plt.legend()
+            plt.title(f"Polygon Comparison: {file}")
+            plt.show()
+            plt.close(fig)  # release the figure before the next file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refine HouseExpo JSON polygons.")
+    parser.add_argument("--plot", action="store_true", help="plot Original vs Filtered for each file")
+    args = parser.parse_args()
+    process_folder(folder_path, plot=args.plot)
 